@@ -8,20 +8,21 @@ upload an image to compare against the gallery using cosine distance.
 # ===================== Imports =====================
 import os
 import io
-import json
+import math
 import base64
-from PIL import Image
 import streamlit as st
 
-import pillow_heif
-pillow_heif.register_heif_opener()
-
-import llm
-from scipy.spatial.distance import cosine
+# Heavy modules (llm/torch, scipy, pillow_heif, mediapipe) are imported by the src modules
+# at first use, so the first page renders before they load; see scripts/check_import_time.py
 from src.translation import t
 from src.clip_model import CLIPModel
+from src.imaging import open_image
+from src.inference_scheduler import InferenceScheduler
 from src.body_prompt import BodyPrompt
 from src.detect_pose import get_pose_landmarks
+from src.indexer import GalleryIndexer, IMAGE_EXTENSIONS
+from src.thumbnails import ThumbnailCache
+from src.index_store import IndexStore, IndexReader
 
 # ===================== Streamlit Config and Language =====================
 st.set_page_config(
@@ -33,21 +34,54 @@ st.sidebar.markdown("## Settings")
 lang_code = st.sidebar.selectbox("🌐 Language", ["en", "ja"], index=1)
 st.session_state["lang"] = lang_code
 
+PAGE_SIZES = [12, 24, 48]
+st.sidebar.selectbox(t("page_size", lang_code), PAGE_SIZES, key="page_size")
+
 # ===================== Model Load =====================
+@st.cache_resource
 def load_model():
-    return CLIPModel()
+    # One model per process behind a scheduler shared by all sessions and the indexer;
+    # the CLIP weights are only loaded when the first embedding is requested
+    workers = int(os.environ.get("IMAGE_SEARCH_INFERENCE_WORKERS", "1"))
+    return InferenceScheduler(CLIPModel(), workers=workers)
 
 model = load_model()
 
+# ===================== Index Store and Background Indexer =====================
+@st.cache_resource
+def load_index_store():
+    # Versioned index generations under index/; an existing db.json seeds the first one
+    store = IndexStore(root="index", legacy_db_path="db.json")
+    return store, IndexReader(store)
+
+index_store, index_reader = load_index_store()
+
+@st.cache_resource
+def start_indexer():
+    # One watcher per server process, shared by every session; new or changed files in
+    # assets/ are embedded incrementally and published as new index generations
+    indexer = GalleryIndexer(model, index_store, gallery_dirs=["assets"])
+    indexer.start()
+    return indexer
+
+indexer = start_indexer()
+
+# ===================== Thumbnail Cache =====================
+@st.cache_resource
+def load_thumbnail_cache():
+    # Shared by all sessions; keeps a bounded number of encoded thumbnails, never PIL images
+    return ThumbnailCache(max_entries=256)
+
+thumbnail_cache = load_thumbnail_cache()
+
 # ===================== File System Helpers =====================
 def get_image_paths():
     """Return a list of image filenames in the assets directory with supported extensions."""
-    return [f for f in os.listdir("assets") if f.lower().endswith(('.png', '.jpg', '.jpeg', '.heic', '.webp'))]
+    # Sorted so page boundaries stay stable between reruns
+    return sorted(f for f in os.listdir("assets") if f.lower().endswith(IMAGE_EXTENSIONS))
 
 def is_db_initialized():
-    return os.path.exists("db.json")
-
-init_done = is_db_initialized()
+    return index_store.is_initialized()
 
 # ===================== Utility Functions =====================
 def img_to_base64(image):
@@ -71,58 +105,72 @@ def render_upload_ui():
     st.markdown(t("upload_prompt", lang_code))
     return st.file_uploader(t("choose_image", lang_code), type=None)
 
-def render_image_grid(image_paths, scores: dict[str, float] = None):
-    """Render a grid of images, optionally displaying similarity scores under each."""
+def render_pagination(total, key):
+    """Render previous/next page controls and return the (start, end) range of the current page."""
+    # The page cursor lives in session state under a per-grid key, so the gallery and
+    # the search results page independently
+    page_key = f"{key}_page"
+    page_size = st.session_state.get("page_size", PAGE_SIZES[0])
+    page_count = max(1, math.ceil(total / page_size))
+    page = min(st.session_state.get(page_key, 0), page_count - 1)
+    st.session_state[page_key] = page
+
+    def go_to(target_page):
+        st.session_state[page_key] = target_page
+
+    prev_col, label_col, next_col = st.columns([1, 2, 1])
+    prev_col.button(t("previous_page", lang_code), key=f"{key}_prev", disabled=page == 0,
+                    on_click=go_to, args=(page - 1,))
+    label_col.markdown(t("page_indicator", lang_code).format(page=page + 1, pages=page_count))
+    next_col.button(t("next_page", lang_code), key=f"{key}_next", disabled=page >= page_count - 1,
+                    on_click=go_to, args=(page + 1,))
+
+    start = page * page_size
+    return start, min(start + page_size, total)
+
+def render_image_grid(image_paths, scores: dict[str, float] = None, key: str = "gallery"):
+    """Render one page of a grid of images, optionally displaying similarity scores under each."""
     st.markdown(t("gallery_images", lang_code))
+    start, end = render_pagination(len(image_paths), key)
+    page_paths = image_paths[start:end]
+
     cols = st.columns(3)  # Adjust number of columns as needed
-    for i, img_path in enumerate(image_paths):
-        img_path_full = os.path.join("assets", img_path)
-        try:
-            img = Image.open(img_path_full).convert("RGB")
-        except Exception as e:
-            st.warning(f"⚠️ Cannot load image {img_path}: {e}")
+    # Thumbnails are produced one at a time, so each image shows up as soon as it is ready
+    thumbnails = thumbnail_cache.iter_thumbnails(os.path.join("assets", p) for p in page_paths)
+    for i, (img_path, (_, thumbnail, error)) in enumerate(zip(page_paths, thumbnails)):
+        if error is not None:
+            st.warning(f"⚠️ Cannot load image {img_path}: {error}")
             continue
 
-        img.thumbnail((400, 300), Image.LANCZOS)
-        new_img = Image.new("RGB", (400, 300), (255, 255, 255))
-        new_img.paste(img, ((400 - img.width) // 2, (300 - img.height) // 2))
-
         with cols[i % 3]:
             caption = f"{img_path}"
             if scores and img_path in scores:
                 caption += f" <span style='color:#000000; font-weight:bold;'>Similarity: {(scores[img_path] * 100):.1f}%</span>"
-            st.image(new_img, width=400, use_container_width=False)
+            st.image(thumbnail, width=400, use_container_width=False)
             st.markdown(caption, unsafe_allow_html=True)
 
+    # Warm the next page in the background while the user looks at this one
+    thumbnail_cache.prefetch(os.path.join("assets", p) for p in image_paths[end:end + (end - start)])
+
 def process_uploaded_image(uploaded_file):
     """Display the uploaded image on the screen."""
-    image = Image.open(uploaded_file).convert("RGB")
+    image = open_image(uploaded_file).convert("RGB")
     st.image(image, caption=t("uploaded_image", lang_code), width=250)
 
 # ===================== Embedding Logic =====================
 def init_embeddings():
-    """Initialize the embedding database from all images in the assets folder."""
-    image_paths = get_image_paths()
-    db = {}
-    for img_path in image_paths:
-        img = Image.open(os.path.join("assets", img_path))
-        with io.BytesIO() as output:
-            img.save(output, format="PNG")
-            img_bytes = output.getvalue()
-        embeddings = [model.embed_image(img_bytes)]
-        if embeddings:
-            db[img_path] = embeddings[0]
-    with open("db.json", "w") as f:
-        json.dump(db, f)
-    st.success(t("embeddings_saved", lang_code))
-    st.toast(t("embedding_completed", lang_code), icon="🎉")
+    """Re-embed all images in the assets folder through the background indexer."""
+    # The indexer's worker embeds them as bulk work and publishes a new index generation,
+    # in order with any uploads or edits that happen meanwhile
+    queued = indexer.reindex_all()
+    st.toast(t("embeddings_queued", lang_code).format(count=queued), icon="🎉")
 
 # ===================== Uploaded Image Embedding =====================
 def handle_uploaded_image_embedding(image_file):
     """Embed the uploaded image and store the vector in session state."""
     with st.spinner("🔄 Processing uploaded image..."):
         # Convert uploaded image to embedding vector and stash it for later matching
-        image = Image.open(image_file).convert("RGB")
+        image = open_image(image_file).convert("RGB")
         with io.BytesIO() as output:
             image.save(output, format="PNG")
             img_bytes = output.getvalue()
@@ -142,15 +190,10 @@ def handle_upload():
 # ===================== Matching Logic =====================
 def get_top_matches(uploaded_vec, db, threshold=0.3, top_k=3):
     """Return top matching images from the DB based on similarity threshold."""
-    # Compare uploaded image vector with gallery DB using cosine similarity
-    similarities = []
-    for name, vec in db.items():
-        similarity = 1 - cosine(uploaded_vec, vec)
-        if similarity >= threshold:
-            similarities.append((name, similarity))
-    # Sort by highest similarity
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    return similarities
+    # Cosine similarity against every vector of the index generation, sorted by highest similarity
+    if db is None:
+        return []
+    return db.search(uploaded_vec, threshold=threshold)
 
 # ===================== Main Application Logic =====================
 def main():
@@ -158,6 +201,9 @@ def main():
     # Run the app UI and flow
     render_init_notice()
 
+    # Re-evaluated on every run so a generation published by another session is picked up
+    init_done = is_db_initialized()
+
     if st.button(t("init_button", lang_code), type="primary"):
         init_embeddings()
         st.rerun()
@@ -174,30 +220,20 @@ def main():
         if st.session_state["uploaded_file"]:
             process_uploaded_image(st.session_state["uploaded_file"])
 
-            # Extract and display pose landmarks
-            pose_image = Image.open(st.session_state["uploaded_file"])
-            pose_names = get_pose_landmarks(pose_image)
-            if pose_names:
-                st.markdown("### 🧍 Detected Pose Landmarks")
-                st.markdown(", ".join(pose_names))
-            else:
-                st.info("No pose landmarks detected.")
-
             st.session_state["threshold"] = st.sidebar.slider(
                 "🔍 Similarity threshold", 0.1, 1.0,
                 0.5, step=0.01
             )
-            
-            uploaded_vec = handle_uploaded_image_embedding(st.session_state["uploaded_file"])
 
-            # Predict the most likely description of the image using semantic prompts
-            all_prompts = [prompt.value for prompt in BodyPrompt]
-            guessed_description, description_score = model.guess_prompt(uploaded_vec, all_prompts)
-            st.markdown(f"**📝 Description guess:** `{guessed_description}` &nbsp;|&nbsp; **Confidence:** {description_score:.2%}")
+            # Pose landmarks and the description guess are filled in after the matches are
+            # shown, so the results do not wait on the slower analyses
+            pose_placeholder = st.empty()
+            description_placeholder = st.empty()
+
+            uploaded_vec = handle_uploaded_image_embedding(st.session_state["uploaded_file"])
 
-            # Load database
-            with open("db.json", "r") as f:
-                db = json.load(f)
+            # Serve the newest published index generation (reopened only when it changed)
+            db = index_reader.current()
 
             top_matches_with_similarities = get_top_matches(uploaded_vec, db, threshold=st.session_state["threshold"])
 
@@ -205,8 +241,29 @@ def main():
             top_matches = [name for name, _ in top_matches_with_similarities]
             similarities_dict = {name: sim for name, sim in top_matches_with_similarities}
 
+            # A new upload opens on its best matches, not on the page the previous one was left at
+            upload_id = st.session_state["uploaded_file"].file_id
+            if st.session_state.get("results_upload_id") != upload_id:
+                st.session_state["results_upload_id"] = upload_id
+                st.session_state["results_page"] = 0
+
             # Render only top matching images
-            render_image_grid(top_matches, scores=similarities_dict)
+            render_image_grid(top_matches, scores=similarities_dict, key="results")
+
+            # Predict the most likely description of the image using semantic prompts
+            all_prompts = [prompt.value for prompt in BodyPrompt]
+            guessed_description, description_score = model.guess_prompt(uploaded_vec, all_prompts)
+            description_placeholder.markdown(f"**📝 Description guess:** `{guessed_description}` &nbsp;|&nbsp; **Confidence:** {description_score:.2%}")
+
+            # Extract and display pose landmarks
+            pose_image = open_image(st.session_state["uploaded_file"])
+            pose_names = get_pose_landmarks(pose_image)
+            with pose_placeholder.container():
+                if pose_names:
+                    st.markdown("### 🧍 Detected Pose Landmarks")
+                    st.markdown(", ".join(pose_names))
+                else:
+                    st.info("No pose landmarks detected.")
 
             return  # Skip rendering all images again
         else:
@@ -0,0 +1,114 @@
+"""
+Import-time profile of the Streamlit app's startup.
+
+Imports `main.py` itself under `python -X importtime`, so its module-level setup (the cached
+model scheduler, index store, background indexer and thumbnail cache, and the threads they
+start) is included, then waits a grace period for imports done by those background threads.
+Fails if any heavy module is loaded before the first page renders, or if the imports take
+longer than the budget.
+
+The app is imported from an empty temporary working directory, so the indexer starts on an
+empty gallery and the check never embeds images or writes to the project's `index/`.
+
+    poetry run python scripts/check_import_time.py [--budget-ms 1500] [--output profile.txt]
+"""
+import os
+import sys
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported at the point of first use
+HEAVY_MODULES = [
+    "llm",
+    "torch",
+    "torchvision",
+    "sentence_transformers",
+    "scipy",
+    "pillow_heif",
+    "mediapipe",
+    "onnxruntime",
+    "clip",
+    "mobileclip",
+]
+
+
+def profile_app_import(app_path, grace_seconds):
+    # Returns [(self_us, cumulative_us, module)] in import order
+    app_dir, app_file = os.path.split(os.path.abspath(app_path))
+    module = os.path.splitext(app_file)[0]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [app_dir, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import time, {module}; time.sleep({grace_seconds})"],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        raise SystemExit("Importing the app failed")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        # Drop the separator space; the remaining indentation is the import depth
+        rows.append((int(self_us), int(cumulative_us), module[1:].rstrip()))
+    return rows
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the import time of the Streamlit app.")
+    parser.add_argument("--app", default=os.path.join(ROOT, "main.py"), help="App module to import and profile")
+    parser.add_argument("--grace-seconds", type=float, default=2.0,
+                        help="Time to wait after the import for imports done by background threads")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Maximum total import time in milliseconds")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest top-level packages to print")
+    parser.add_argument("--output", help="Also write the raw profile (module, self, cumulative) to this file")
+    args = parser.parse_args()
+
+    rows = profile_app_import(args.app, args.grace_seconds)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("self_us\tcumulative_us\tmodule\n")
+            for self_us, cumulative_us, module in rows:
+                f.write(f"{self_us}\t{cumulative_us}\t{module.strip()}\n")
+
+    # Packages imported directly (no indentation) carry the cumulative cost of their dependencies;
+    # the app itself is one of them, so the packages it imports (one level deeper) are listed too
+    app_module = os.path.splitext(os.path.basename(args.app))[0]
+    top_level = [(cumulative_us, module.strip()) for _, cumulative_us, module in rows if module == module.lstrip()]
+    total_ms = sum(cumulative_us for cumulative_us, _ in top_level) / 1000
+    listed = [
+        (cumulative_us, module.strip()) for _, cumulative_us, module in rows
+        if len(module) - len(module.lstrip()) <= 2 and module.strip() != app_module
+    ]
+
+    print(f"Import of {os.path.relpath(args.app, ROOT)} with its module-level setup ({args.grace_seconds:g} s grace)")
+    print("\nSlowest packages (cumulative):")
+    for cumulative_us, module in sorted(listed, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+    print(f"\nTotal, including interpreter startup: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    imported = {module.strip() for _, _, module in rows}
+    heavy = sorted(name for name in HEAVY_MODULES if name in imported)
+
+    failed = False
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Import time {total_ms:.1f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Import-time check passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Concurrent-session load test of the image search path.
+
+Each simulated client does what a Streamlit session of `main.py` does for an upload: embed
+the query image through the shared InferenceScheduler (interactive priority), search the
+live index generation, guess the body prompt and detect pose landmarks with mediapipe on
+the client's own thread. The number of concurrent clients is ramped and, for every level,
+throughput, latency percentiles, errors and the peak RSS sampled during that level are reported,
+along with the scheduler's adaptive batch sizes at the end of the level.
+
+By default a stub model (deterministic vectors, simulated latency) is used so the harness
+runs without the CLIP weights, and pose detection is skipped; pass `--model clip` to measure
+the real model, which also enables pose detection (`--pose` / `--skip-pose` override it).
+
+    poetry run python scripts/load_test.py --concurrency 1,2,4,8,16 --requests 20
+"""
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import resource
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.body_prompt import BodyPrompt
+from src.imaging import open_image, to_png_bytes
+from src.index_store import IndexStore, IndexReader
+from src.indexer import is_image_file
+from src.inference_scheduler import InferenceScheduler, Priority
+
+
+class StubModel:
+    """
+    Stand-in for CLIPModel: deterministic vectors derived from the input bytes and a
+    simulated latency of `base + per_item * batch_size`, so batching behaves like a real model.
+    """
+
+    def __init__(self, dimensions=512, base_latency_ms=20.0, per_item_latency_ms=5.0):
+        self.dimensions = dimensions
+        self.base_latency = base_latency_ms / 1000
+        self.per_item_latency = per_item_latency_ms / 1000
+
+    def _vector(self, item):
+        data = item.encode() if isinstance(item, str) else item
+        seed = int.from_bytes(hashlib.sha256(data).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32).tolist()
+
+    def _embed(self, items):
+        time.sleep(self.base_latency + self.per_item_latency * len(items))
+        return [self._vector(item) for item in items]
+
+    def embed_images(self, images_bytes):
+        return self._embed(images_bytes)
+
+    def embed_prompts(self, prompts):
+        return self._embed(prompts)
+
+    def similarity(self, vec1, vec2):
+        a, b = np.asarray(vec1), np.asarray(vec2)
+        return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(np.ceil(p / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def current_rss_mb():
+    # Resident set size right now: psutil if installed, else /proc (Linux), else the
+    # lifetime peak from getrusage as a last resort
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+class RssSampler:
+    """Sample the current RSS in a background thread and keep the maximum seen."""
+
+    def __init__(self, interval_seconds=0.05):
+        self.interval_seconds = interval_seconds
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def __enter__(self):
+        self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+def load_queries(query_dir, limit):
+    paths = sorted(
+        os.path.join(query_dir, name) for name in os.listdir(query_dir)
+        if is_image_file(name)
+    )[:limit or None]
+    queries = []
+    for path in paths:
+        try:
+            queries.append(to_png_bytes(path))
+        except Exception as e:
+            print(f"⚠️ Skipped {path}: {e}")
+    return queries
+
+
+def search_once(model, reader, query_bytes, threshold, prompts, pose):
+    # Same steps as main.py for one uploaded image
+    vector = model.embed_image(query_bytes, priority=Priority.INTERACTIVE)
+    generation = reader.current()
+    matches = generation.search(vector, threshold=threshold) if generation is not None else []
+    if prompts:
+        model.guess_prompt(vector, prompts)
+    if pose:
+        # Runs on the session thread in main.py, competing with inference for the CPU
+        from src.detect_pose import get_pose_landmarks
+        get_pose_landmarks(open_image(io.BytesIO(query_bytes)))
+    return matches
+
+
+def run_level(model, reader, queries, concurrency, requests_per_client, threshold, prompts, pose):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(client_id):
+        barrier.wait()
+        for i in range(requests_per_client):
+            query = queries[(client_id + i * concurrency) % len(queries)]
+            started = time.perf_counter()
+            try:
+                search_once(model, reader, query, threshold, prompts, pose)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    # Peak RSS of this level only, not of the index build or earlier levels
+    with RssSampler() as rss:
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies) + len(errors)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "throughput_rps": len(latencies) / wall if wall > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "error_rate": len(errors) / total if total else 0.0,
+        "peak_rss_mb": rss.peak_mb,
+        "first_error": errors[0] if errors else None,
+        # Batch sizes and per-item latencies the scheduler converged to under this load
+        "scheduler": model.stats(),
+    }
+
+
+def build_index(model, queries, root):
+    # Index the query corpus itself so every search has a realistic number of hits
+    store = IndexStore(root=root, legacy_db_path=None)
+    vectors = model.embed_images(queries, priority=Priority.BULK)
+    store.publish({f"image-{i}": vector for i, vector in enumerate(vectors)})
+    return store
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the image search path with concurrent clients.")
+    parser.add_argument("--queries", default="assets", help="Directory of query images (default: assets)")
+    parser.add_argument("--max-queries", type=int, default=0, help="Use at most this many query images (0: all)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated concurrency levels to ramp through")
+    parser.add_argument("--requests", type=int, default=20, help="Searches per client at each level")
+    parser.add_argument("--model", choices=["stub", "clip"], default="stub", help="Embedding model (default: stub)")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0, help="Fixed latency of a stub model call")
+    parser.add_argument("--stub-item-latency-ms", type=float, default=5.0, help="Additional stub latency per batched item")
+    parser.add_argument("--workers", type=int, default=1, help="Inference scheduler workers")
+    parser.add_argument("--index", help="IndexStore root to search (default: a temporary index of the query images)")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Similarity threshold of the search")
+    parser.add_argument("--skip-prompts", action="store_true", help="Do not guess the body prompt for each query")
+    parser.add_argument("--pose", dest="pose", action="store_true", help="Detect pose landmarks for each query (default with --model clip)")
+    parser.add_argument("--skip-pose", dest="pose", action="store_false", help="Do not detect pose landmarks for each query")
+    parser.set_defaults(pose=None)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.model == "clip":
+        from src.clip_model import CLIPModel
+        base_model = CLIPModel()
+    else:
+        base_model = StubModel(base_latency_ms=args.stub_latency_ms, per_item_latency_ms=args.stub_item_latency_ms)
+    model = InferenceScheduler(base_model, workers=args.workers)
+
+    queries = load_queries(args.queries, args.max_queries)
+    if not queries:
+        raise SystemExit(f"No query images found in {args.queries}")
+    prompts = [] if args.skip_prompts else [prompt.value for prompt in BodyPrompt]
+    pose = args.pose if args.pose is not None else args.model == "clip"
+
+    with tempfile.TemporaryDirectory() as tmp_root:
+        store = IndexStore(root=args.index, legacy_db_path=None) if args.index else build_index(model, queries, tmp_root)
+        reader = IndexReader(store)
+        if reader.current() is None:
+            raise SystemExit(f"No index generation published in {store.root}")
+
+        print(
+            f"Model: {args.model}, prompts: {'on' if prompts else 'off'}, pose: {'on' if pose else 'off'}, "
+            f"queries: {len(queries)}, index: {len(reader.current())} images"
+        )
+        header = f"{'clients':>7} {'requests':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak RSS MB':>11}"
+        print(header)
+        print("-" * len(header))
+
+        results = []
+        for concurrency in [int(level) for level in args.concurrency.split(",")]:
+            result = run_level(model, reader, queries, concurrency, args.requests, args.threshold, prompts, pose)
+            results.append(result)
+            print(
+                f"{result['concurrency']:>7} {result['requests']:>8} {result['throughput_rps']:>8.1f} "
+                f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                f"{result['error_rate']:>7.1%} {result['peak_rss_mb']:>11.1f}"
+            )
+            stats = result["scheduler"]
+            print(
+                f"  interactive batches: image {stats['interactive_image_batch_size']} "
+                f"({stats['interactive_image_seconds_per_item'] * 1000:.1f} ms/item), "
+                f"text {stats['interactive_text_batch_size']} "
+                f"({stats['interactive_text_seconds_per_item'] * 1000:.1f} ms/item)"
+            )
+            if result["first_error"]:
+                print(f"  first error: {result['first_error']}")
+
+    model.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
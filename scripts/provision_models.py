@@ -0,0 +1,24 @@
+"""
+Download and cache the model weights used by the app, so containers can start offline.
+
+Run at image build time, after `llm install llm-clip`:
+
+    poetry run python scripts/provision_models.py
+"""
+import llm
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Download and cache the embedding model weights.")
+    parser.add_argument("--model", default="clip", help="Name of the llm embedding model (default: clip)")
+    args = parser.parse_args()
+
+    # The llm-clip plugin loads (and downloads) its weights on the first embedding
+    model = llm.get_embedding_model(args.model)
+    vector = list(model.embed_batch(["warm up"]))[0]
+    print(f"Model '{args.model}' is cached ({len(vector)} dimensions)")
+
+if __name__ == "__main__":
+    main()
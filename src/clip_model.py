@@ -1,6 +1,5 @@
-import llm
+import threading
 from typing import List, Tuple
-from scipy.spatial.distance import cosine
 
 
 class CLIPModel:
@@ -11,13 +10,26 @@ class CLIPModel:
 
     def __init__(self, model_name: str = "clip"):
         """
-        Initialize the embedding model.
+        Initialize the embedding model. The model itself is loaded on first use.
 
         Args:
             model_name (str): Name of the model (default: "clip")
         """
-        # Load the CLIP embedding model from the llm library
-        self.model = llm.get_embedding_model(model_name)
+        self.model_name = model_name
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The llm embedding model, loaded on first access."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    # llm discovers and imports its plugins (and torch) on import, so defer it
+                    import llm
+                    # Load the CLIP embedding model from the llm library
+                    self._model = llm.get_embedding_model(self.model_name)
+        return self._model
 
     def embed_image(self, image_bytes: bytes) -> List[float]:
         """
@@ -32,6 +44,19 @@ class CLIPModel:
         # Embed the image into vector space; batch returns a list so extract the first item
         return self.model.embed_batch([image_bytes])[0]
 
+    def embed_images(self, images_bytes: List[bytes]) -> List[List[float]]:
+        """
+        Embed several images into vector space in a single batch.
+
+        Args:
+            images_bytes (List[bytes]): Raw image data for each image
+
+        Returns:
+            List[List[float]]: Vector representations, in the same order as the input
+        """
+        # One batched call amortises the model overhead across all images
+        return list(self.model.embed_batch(images_bytes))
+
     def embed_prompts(self, prompts: List[str]) -> List[List[float]]:
         """
         Embed a list of textual prompts into vector space.
@@ -56,6 +81,8 @@ class CLIPModel:
         Returns:
             float: Similarity score (1.0 is most similar)
         """
+        from scipy.spatial.distance import cosine
+
         # Cosine similarity: the closer to 1.0, the more similar the vectors
         return 1 - cosine(vec1, vec2)
 
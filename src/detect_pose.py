@@ -1,8 +1,5 @@
 import numpy as np
 from PIL import Image
-import mediapipe as mp
-
-mp_pose = mp.solutions.pose
 
 
 def get_pose_landmarks(pil_image: Image.Image):
@@ -15,6 +12,10 @@ def get_pose_landmarks(pil_image: Image.Image):
     Returns:
         List[str]: A list of pose landmark names detected in the image.
     """
+    # mediapipe takes seconds to import, so only load it once pose detection is requested
+    import mediapipe as mp
+    mp_pose = mp.solutions.pose
+
     image_np = np.array(pil_image.convert("RGB"))
     
     with mp_pose.Pose(static_image_mode=True) as pose:
@@ -0,0 +1,57 @@
+import io
+import threading
+from typing import BinaryIO, Union
+
+from PIL import Image, UnidentifiedImageError
+
+_heif_registered = False
+_heif_lock = threading.Lock()
+
+
+def register_heif_opener():
+    """Register the HEIF/HEIC decoder with Pillow. pillow_heif is only imported on first call."""
+    global _heif_registered
+    with _heif_lock:
+        if _heif_registered:
+            return
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+        _heif_registered = True
+
+
+def open_image(source: Union[str, BinaryIO]) -> Image.Image:
+    """
+    Open an image with Pillow, loading HEIF/HEIC support only when a file needs it.
+
+    Args:
+        source (Union[str, BinaryIO]): File path or file-like object
+
+    Returns:
+        Image.Image: The opened image
+    """
+    position = source.tell() if hasattr(source, "tell") else None
+    try:
+        return Image.open(source)
+    except UnidentifiedImageError:
+        if _heif_registered:
+            raise
+        register_heif_opener()
+        if position is not None:
+            source.seek(position)
+        return Image.open(source)
+
+
+def to_png_bytes(source: Union[str, BinaryIO]) -> bytes:
+    """
+    Re-encode an image as PNG bytes, the format fed to the embedding model.
+
+    Args:
+        source (Union[str, BinaryIO]): File path or file-like object
+
+    Returns:
+        bytes: PNG-encoded image data
+    """
+    img = open_image(source)
+    with io.BytesIO() as output:
+        img.save(output, format="PNG")
+        return output.getvalue()
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialised within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "LOCK"
+GENERATION_PREFIX = "gen-"
+TMP_PREFIX = ".tmp-"
+VECTORS_FILE = "vectors.npy"
+NAMES_FILE = "names.json"
+MTIMES_FILE = "mtimes.json"
+
+
+def _generation_name(generation_id: int) -> str:
+    return f"{GENERATION_PREFIX}{generation_id:06d}"
+
+
+def _fsync_file(path: str):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+class IndexGeneration:
+    """
+    One immutable, published version of the embedding index.
+
+    Vectors are stored L2-normalised in a float32 matrix that is memory-mapped read-only,
+    so opening a generation is cheap and its pages are shared between sessions.
+    """
+
+    def __init__(self, generation_id: int, path: str):
+        """
+        Open a published generation.
+
+        Args:
+            generation_id (int): Monotonic generation number
+            path (str): Directory of the generation
+        """
+        self.generation_id = generation_id
+        self.path = path
+        with open(os.path.join(path, NAMES_FILE), "r") as f:
+            self.names: List[str] = json.load(f)
+        # When the generation was written, and the source file mtimes it was built from
+        # (generations written without mtimes fall back to the publish time)
+        self.published_at = os.path.getmtime(os.path.join(path, NAMES_FILE))
+        try:
+            with open(os.path.join(path, MTIMES_FILE), "r") as f:
+                self.mtimes: Dict[str, float] = json.load(f)
+        except FileNotFoundError:
+            self.mtimes = {}
+        if self.names:
+            self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        else:
+            # Zero-length files cannot be memory-mapped
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def source_mtime(self, name: str) -> float:
+        """Return the mtime of the file `name` was embedded from, or the publish time if unknown."""
+        return self.mtimes.get(name, self.published_at)
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        """Return the generation as a name -> (normalised) vector dict."""
+        return {name: self.vectors[i].tolist() for i, name in enumerate(self.names)}
+
+    def search(self, query_vec: List[float], threshold: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Return (name, cosine similarity) pairs at or above the threshold, best first.
+
+        Args:
+            query_vec (List[float]): Query embedding
+            threshold (float): Minimum similarity to keep
+
+        Returns:
+            List[Tuple[str, float]]: Matches sorted by descending similarity
+        """
+        if not self.names:
+            return []
+        query = np.asarray(query_vec, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        similarities = self.vectors @ (query / norm)
+        hits = np.nonzero(similarities >= threshold)[0]
+        hits = hits[np.argsort(-similarities[hits], kind="stable")]
+        return [(self.names[i], float(similarities[i])) for i in hits]
+
+
+class IndexStore:
+    """
+    Versioned on-disk index with atomic publication.
+
+    Layout under `root`:
+        gen-000001/vectors.npy, gen-000001/names.json, ...   immutable generations
+        CURRENT                                               name of the live generation
+
+    A writer builds a new generation in a temporary directory, renames it into place and
+    then atomically replaces CURRENT. Readers only ever see complete generations.
+
+    Id allocation, the pointer swap and garbage collection run under an exclusive lock on
+    `root/LOCK` (shared by every process using the same root), so generation ids and CURRENT
+    only ever move forward and a generation cannot be collected before it goes live.
+    """
+
+    def __init__(self, root: str = "index", legacy_db_path: Optional[str] = "db.json", keep: int = 2):
+        """
+        Initialize the store.
+
+        Args:
+            root (str): Directory holding the generations (default: "index")
+            legacy_db_path (Optional[str]): Old `db.json` imported as the first generation if present
+            keep (int): Number of most recent generations kept on disk
+        """
+        self.root = root
+        self.legacy_db_path = legacy_db_path
+        self.keep = max(1, keep)
+        self._write_lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._import_legacy_db()
+
+    # ===================== Pointer =====================
+    @property
+    def current_path(self) -> str:
+        return os.path.join(self.root, CURRENT_FILE)
+
+    def current_generation_id(self) -> Optional[int]:
+        """Return the id of the live generation, or None if nothing was published yet."""
+        try:
+            with open(self.current_path, "r") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return int(name[len(GENERATION_PREFIX):])
+
+    def is_initialized(self) -> bool:
+        """Return True once at least one generation has been published."""
+        return self.current_generation_id() is not None
+
+    def open_current(self, attempts: int = 3) -> Optional[IndexGeneration]:
+        """
+        Open the live generation, or return None if nothing was published yet.
+
+        If the generation is collected between reading CURRENT and opening it (several
+        publishes happened in between), CURRENT is read again, up to `attempts` times.
+        """
+        for attempt in range(attempts):
+            generation_id = self.current_generation_id()
+            if generation_id is None:
+                return None
+            try:
+                return IndexGeneration(generation_id, os.path.join(self.root, _generation_name(generation_id)))
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+
+    # ===================== Writer =====================
+    def publish(self, index: Dict[str, List[float]], mtimes: Optional[Dict[str, float]] = None) -> int:
+        """
+        Write `index` as a new generation and make it the live one.
+
+        Args:
+            index (Dict[str, List[float]]): Image name -> embedding vector
+            mtimes (Optional[Dict[str, float]]): Image name -> mtime of the file that was embedded
+
+        Returns:
+            int: Id of the published generation
+        """
+        names = list(index.keys())
+        if names:
+            vectors = np.asarray([index[name] for name in names], dtype=np.float32)
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        # Build the generation off to the side; this is the slow part and needs no lock
+        tmp_dir = os.path.join(self.root, f"{TMP_PREFIX}{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, VECTORS_FILE), vectors)
+        with open(os.path.join(tmp_dir, NAMES_FILE), "w") as f:
+            json.dump(names, f)
+        with open(os.path.join(tmp_dir, MTIMES_FILE), "w") as f:
+            json.dump({name: mtimes[name] for name in names if name in (mtimes or {})}, f)
+        for name in (VECTORS_FILE, NAMES_FILE, MTIMES_FILE):
+            _fsync_file(os.path.join(tmp_dir, name))
+
+        with self._locked():
+            # Move it into place under the next id; the lock makes the id strictly
+            # greater than every generation published so far, including the live one
+            generation_id = max(self._generation_ids(), default=0) + 1
+            os.rename(tmp_dir, os.path.join(self.root, _generation_name(generation_id)))
+
+            # Swap the pointer
+            tmp_current = f"{self.current_path}.{os.getpid()}.tmp"
+            with open(tmp_current, "w") as f:
+                f.write(_generation_name(generation_id))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_current, self.current_path)
+
+            self._collect_garbage()
+        logger.info("Published index generation %d (%d images)", generation_id, len(names))
+        return generation_id
+
+    def _collect_garbage(self, tmp_max_age_seconds: float = 3600):
+        # Delete generations older than the `keep` most recent ones, and abandoned temp dirs.
+        # Runs on every publish with the store lock held. Readers that still have an old
+        # generation memory-mapped keep working: on POSIX the mapping stays valid after unlink.
+        current_id = self.current_generation_id()
+        ids = sorted(self._generation_ids(), reverse=True)
+        keep_ids = set(ids[:self.keep])
+        if current_id is not None:
+            keep_ids.add(current_id)
+        for generation_id in ids:
+            if generation_id not in keep_ids:
+                shutil.rmtree(os.path.join(self.root, _generation_name(generation_id)), ignore_errors=True)
+
+        now = time.time()
+        for name in os.listdir(self.root):
+            if name.startswith(TMP_PREFIX):
+                path = os.path.join(self.root, name)
+                try:
+                    if now - os.path.getmtime(path) > tmp_max_age_seconds:
+                        shutil.rmtree(path, ignore_errors=True)
+                except FileNotFoundError:
+                    pass
+
+    # ===================== Helpers =====================
+    @contextmanager
+    def _locked(self):
+        # The thread lock covers writers sharing this store object; flock covers other
+        # store objects and processes (flock locks are per open file description)
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _generation_ids(self) -> List[int]:
+        ids = []
+        for name in os.listdir(self.root):
+            if name.startswith(GENERATION_PREFIX):
+                try:
+                    ids.append(int(name[len(GENERATION_PREFIX):]))
+                except ValueError:
+                    continue
+        return ids
+
+    def _import_legacy_db(self):
+        # Seed the store from the old single-file db.json the first time it is opened
+        if self.is_initialized() or not self.legacy_db_path or not os.path.exists(self.legacy_db_path):
+            return
+        with open(self.legacy_db_path, "r") as f:
+            self.publish(json.load(f))
+
+
+class IndexReader:
+    """
+    Serve the generation a reader opened until a newer one is published.
+
+    `current()` only stats the CURRENT pointer file on each call; the new generation is
+    opened (memory-mapped) just when the pointer actually changed.
+    """
+
+    def __init__(self, store: IndexStore):
+        """
+        Initialize the reader.
+
+        Args:
+            store (IndexStore): Store to read generations from
+        """
+        self.store = store
+        self._generation: Optional[IndexGeneration] = None
+        self._pointer_stat: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[IndexGeneration]:
+        """Return the newest published generation, reopening only when it changed."""
+        try:
+            st = os.stat(self.store.current_path)
+            pointer_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return self._generation
+        if pointer_stat == self._pointer_stat:
+            return self._generation
+        with self._lock:
+            if pointer_stat != self._pointer_stat:
+                try:
+                    generation = self.store.open_current()
+                except FileNotFoundError:
+                    # Pointer moved again and the generation was collected meanwhile;
+                    # keep serving the one we have and retry on the next call
+                    return self._generation
+                self._generation = generation
+                self._pointer_stat = pointer_stat
+        return self._generation
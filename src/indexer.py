@@ -0,0 +1,299 @@
+import os
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from src.imaging import to_png_bytes
+from src.index_store import IndexStore
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.heic', '.webp')
+
+
+def is_image_file(path: str) -> bool:
+    """Return True if the path looks like a gallery image (supported extension, not hidden)."""
+    name = os.path.basename(path)
+    return not name.startswith(".") and name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+class _GalleryEventHandler(FileSystemEventHandler):
+    """
+    Forward watchdog file system events for image files to the indexer.
+    """
+
+    def __init__(self, indexer: "GalleryIndexer"):
+        super().__init__()
+        self.indexer = indexer
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.indexer.notify_changed(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.indexer.notify_changed(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.indexer.notify_deleted(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.indexer.notify_deleted(event.src_path)
+            self.indexer.notify_changed(event.dest_path)
+
+
+class GalleryIndexer:
+    """
+    Background indexer that keeps the embedding index in sync with the gallery directories.
+
+    File system events are collected by a watchdog observer, debounced into batches and
+    only the affected files are embedded. Each batch is published as a new generation of
+    the `IndexStore`, so searches reading through an `IndexReader` never wait on (or
+    observe a half-applied) update.
+    """
+
+    MAX_DELAY_FACTOR = 5
+    RETRY_INITIAL_SECONDS = 1.0
+    RETRY_MAX_SECONDS = 60.0
+
+    def __init__(
+        self,
+        model,
+        store: IndexStore,
+        gallery_dirs: Iterable[str] = ("assets",),
+        debounce_seconds: float = 1.0,
+        max_batch_size: int = 16,
+    ):
+        """
+        Initialize the indexer.
+
+        Args:
+            model: Embedding model exposing `embed_images(List[bytes])`
+            store (IndexStore): Store the updated index generations are published to
+            gallery_dirs (Iterable[str]): Directories to watch (default: ["assets"])
+            debounce_seconds (float): Quiet period before a burst of events is processed
+            max_batch_size (int): Maximum number of images embedded per model call
+        """
+        self.model = model
+        self.gallery_dirs = [os.path.abspath(d) for d in gallery_dirs]
+        self.store = store
+        self.debounce_seconds = debounce_seconds
+        self.max_batch_size = max_batch_size
+
+        self._index: Dict[str, List[float]] = {}
+        self._mtimes: Dict[str, float] = {}  # key -> mtime of the file the vector came from
+        self._pending: Dict[str, bool] = {}  # absolute path -> True if deleted
+        self._cond = threading.Condition()
+        self._publish_lock = threading.Lock()
+        self._last_event = 0.0
+        self._retry_at = 0.0
+        self._retry_delay = 0.0
+        self._stopped = False
+        self._observer: Optional[Observer] = None
+        self._worker: Optional[threading.Thread] = None
+
+    # ===================== Lifecycle =====================
+    def start(self):
+        """Load the live generation, queue a catch-up scan and start watching the gallery."""
+        generation = self.store.open_current()
+        if generation is not None:
+            self._index = generation.to_dict()
+            self._mtimes = {key: generation.source_mtime(key) for key in self._index}
+        self._queue_reconcile()
+
+        self._observer = Observer()
+        handler = _GalleryEventHandler(self)
+        for gallery_dir in self.gallery_dirs:
+            os.makedirs(gallery_dir, exist_ok=True)
+            self._observer.schedule(handler, gallery_dir, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+
+        self._worker = threading.Thread(target=self._run, name="gallery-indexer", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Stop watching and wait for the worker to finish its current batch."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._worker is not None:
+            self._worker.join()
+
+    # ===================== Full Rebuild =====================
+    def reindex_all(self) -> int:
+        """
+        Queue every gallery image for re-embedding (e.g. from "Init embeddings").
+
+        The files go through the same worker as file system events, so uploads and edits made
+        while the rebuild runs are applied in order instead of being overwritten by it.
+
+        Returns:
+            int: Number of images queued
+        """
+        paths = self._gallery_files()
+        if not paths and not self.store.is_initialized():
+            # Nothing to embed, but the app should still see an (empty) index
+            with self._publish_lock:
+                self.store.publish({}, {})
+        for path in paths:
+            self._enqueue(path, deleted=False)
+        return len(paths)
+
+    # ===================== Event Intake =====================
+    def notify_changed(self, path: str):
+        """Record that an image was created or modified."""
+        self._enqueue(path, deleted=False)
+
+    def notify_deleted(self, path: str):
+        """Record that an image was removed."""
+        self._enqueue(path, deleted=True)
+
+    def _enqueue(self, path: str, deleted: bool):
+        if not is_image_file(path):
+            return
+        with self._cond:
+            # Later events win: create+delete collapses to delete, delete+create to upsert
+            self._pending[os.path.abspath(path)] = deleted
+            self._last_event = time.monotonic()
+            self._cond.notify_all()
+
+    def _queue_reconcile(self):
+        # Catch up on changes made while the app was not running: embed unknown files and
+        # files modified since they were embedded, drop entries whose files are gone.
+        # Unchanged files are not re-embedded.
+        on_disk = set()
+        for path in self._gallery_files():
+            key = self._key_for(path)
+            on_disk.add(key)
+            if key not in self._index or os.path.getmtime(path) > self._mtimes.get(key, 0.0):
+                self._enqueue(path, deleted=False)
+        for key in self._index:
+            if key not in on_disk:
+                self._enqueue(self._path_for(key), deleted=True)
+
+    # ===================== Worker =====================
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._apply(batch)
+            except Exception:
+                self._requeue(batch)
+            else:
+                self._retry_delay = 0.0
+
+    def _requeue(self, batch: Dict[str, bool]):
+        # Put a failed batch back (e.g. the model or the disk is temporarily unavailable) and
+        # hold the worker off with an exponential backoff; newer events for a path win
+        self._retry_delay = min(self.RETRY_MAX_SECONDS, max(self.RETRY_INITIAL_SECONDS, self._retry_delay * 2))
+        logger.exception(
+            "Failed to apply index update for %d file(s), retrying in %.1fs", len(batch), self._retry_delay
+        )
+        with self._cond:
+            for path, deleted in batch.items():
+                self._pending.setdefault(path, deleted)
+            self._retry_at = time.monotonic() + self._retry_delay
+
+    def _next_batch(self) -> Optional[Dict[str, bool]]:
+        # Block until events arrive, then wait for a quiet period so a burst
+        # (e.g. a folder copy, or the several modify events of one write) becomes one batch.
+        # A steady stream of events is still flushed every `MAX_DELAY_FACTOR` quiet periods.
+        # After a failed batch nothing is taken before the retry backoff has elapsed.
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                if self._pending and now >= self._retry_at:
+                    break
+                self._cond.wait(timeout=self._retry_at - now if self._pending else None)
+            if self._stopped:
+                return None
+            deadline = time.monotonic() + self.debounce_seconds * self.MAX_DELAY_FACTOR
+            while not self._stopped:
+                quiet_for = time.monotonic() - self._last_event
+                if quiet_for >= self.debounce_seconds or time.monotonic() >= deadline:
+                    break
+                self._cond.wait(timeout=self.debounce_seconds - quiet_for)
+            if self._stopped:
+                return None
+            batch, self._pending = self._pending, {}
+            return batch
+
+    def _apply(self, batch: Dict[str, bool]):
+        upserts = [path for path, deleted in batch.items() if not deleted]
+        deletes = [path for path, deleted in batch.items() if deleted]
+
+        embedded, mtimes = self._embed_files(upserts)
+
+        with self._publish_lock:
+            index = dict(self._index)
+            removed = [key for key in map(self._key_for, deletes) if index.pop(key, None) is not None]
+            if not embedded and not removed:
+                # Nothing loaded and nothing indexed was deleted; keep the live generation
+                return
+            index.update(embedded)
+            index_mtimes = {key: mtime for key, mtime in self._mtimes.items() if key in index}
+            index_mtimes.update(mtimes)
+            self.store.publish(index, index_mtimes)
+            self._index = index
+            self._mtimes = index_mtimes
+
+        logger.info("Indexed %d file(s), removed %d file(s)", len(embedded), len(removed))
+
+    def _embed_files(self, paths: List[str]) -> Tuple[Dict[str, List[float]], Dict[str, float]]:
+        embedded = {}
+        mtimes = {}
+        for start in range(0, len(paths), self.max_batch_size):
+            chunk = []
+            for path in paths[start:start + self.max_batch_size]:
+                try:
+                    # Taken before reading, so a write that races the read is re-embedded later
+                    mtime = os.path.getmtime(path)
+                    chunk.append((path, mtime, to_png_bytes(path)))
+                except Exception as e:
+                    # Usually a file still being written; its next modify event retries it
+                    logger.warning("Cannot load image %s: %s", path, e)
+            if not chunk:
+                continue
+            vectors = self.model.embed_images([img_bytes for _, _, img_bytes in chunk])
+            for (path, mtime, _), vector in zip(chunk, vectors):
+                embedded[self._key_for(path)] = list(vector)
+                mtimes[self._key_for(path)] = mtime
+        return embedded, mtimes
+
+    # ===================== Path Helpers =====================
+    def _gallery_files(self) -> List[str]:
+        paths = []
+        for gallery_dir in self.gallery_dirs:
+            if not os.path.isdir(gallery_dir):
+                continue
+            for name in os.listdir(gallery_dir):
+                path = os.path.join(gallery_dir, name)
+                if is_image_file(path) and os.path.isfile(path):
+                    paths.append(path)
+        return paths
+
+    def _key_for(self, path: str) -> str:
+        # Index keys are file names relative to their gallery directory, as used by the UI
+        path = os.path.abspath(path)
+        for gallery_dir in self.gallery_dirs:
+            if os.path.dirname(path) == gallery_dir:
+                return os.path.basename(path)
+        return path
+
+    def _path_for(self, key: str) -> str:
+        if os.path.isabs(key):
+            return key
+        return os.path.join(self.gallery_dirs[0], key)
+
@@ -0,0 +1,335 @@
+import os
+import time
+import logging
+import threading
+from enum import IntEnum
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_threads_configured = False
+_threads_lock = threading.Lock()
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BULK = 1
+
+
+INTRA_OP_THREADS_ENV = "IMAGE_SEARCH_INTRA_OP_THREADS"
+INTER_OP_THREADS_ENV = "IMAGE_SEARCH_INTER_OP_THREADS"
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+def _resolve_thread_count(value: Optional[int], env_name: str) -> Optional[int]:
+    """
+    Return an explicit thread count, else the one set in `env_name`, else None.
+
+    Raises:
+        ValueError: If the value is not a positive integer
+    """
+    source = "argument"
+    if value is None:
+        value, source = _env_int(env_name), env_name
+    if value is not None and value < 1:
+        raise ValueError(f"Thread count must be at least 1, got {value} from {source}")
+    return value
+
+
+def configure_threads(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+    """
+    Cap the CPU threads used by the inference runtimes of this process.
+
+    Falls back to the IMAGE_SEARCH_INTRA_OP_THREADS / IMAGE_SEARCH_INTER_OP_THREADS environment
+    variables. Only the first call has an effect: torch refuses to change the inter-op pool once
+    it has been used. Failures are logged rather than raised, so inference still runs (with the
+    runtime's default thread pools) when the caps cannot be applied.
+
+    Args:
+        intra_op_threads (Optional[int]): Threads used inside a single operator
+        inter_op_threads (Optional[int]): Threads used to run independent operators in parallel
+    """
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured:
+            return
+        _threads_configured = True
+
+        try:
+            intra_op_threads = _resolve_thread_count(intra_op_threads, INTRA_OP_THREADS_ENV)
+            inter_op_threads = _resolve_thread_count(inter_op_threads, INTER_OP_THREADS_ENV)
+        except ValueError as e:
+            logger.warning("Ignoring CPU thread settings: %s", e)
+            return
+
+        if intra_op_threads:
+            # Picked up by OpenMP/MKL (torch, onnxruntime) if they have not started yet
+            for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+                os.environ.setdefault(var, str(intra_op_threads))
+
+        try:
+            import torch
+        except ImportError:
+            return
+        except Exception as e:
+            logger.warning("Cannot import torch to set its thread pools: %s", e)
+            return
+        if intra_op_threads:
+            try:
+                torch.set_num_threads(intra_op_threads)
+            except Exception as e:
+                logger.warning("Cannot set intra-op threads to %d: %s", intra_op_threads, e)
+        if inter_op_threads:
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except Exception as e:
+                logger.warning("Cannot set inter-op threads to %d: %s", inter_op_threads, e)
+
+
+class AdaptiveBatchSizer:
+    """
+    Pick the next batch size from the observed per-item latency and the queue depth.
+
+    Batches grow while one batch still fits in `target_batch_seconds` and enough work is queued,
+    and shrink as soon as items get slower (e.g. when the host is busy). Bounding the duration
+    of a batch bounds how long an interactive request can wait behind bulk work.
+    """
+
+    def __init__(self, target_batch_seconds: float = 0.5, min_size: int = 1, max_size: int = 32, smoothing: float = 0.3):
+        """
+        Initialize the sizer.
+
+        Args:
+            target_batch_seconds (float): Desired wall time of one batch
+            min_size (int): Smallest batch size
+            max_size (int): Largest batch size
+            smoothing (float): Weight of the newest observation in the moving average
+        """
+        self.target_batch_seconds = target_batch_seconds
+        self.min_size = min_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.seconds_per_item: Optional[float] = None
+
+    def observe(self, batch_size: int, elapsed_seconds: float):
+        """Record how long a batch of `batch_size` items took."""
+        per_item = elapsed_seconds / max(1, batch_size)
+        if self.seconds_per_item is None:
+            self.seconds_per_item = per_item
+        else:
+            self.seconds_per_item += self.smoothing * (per_item - self.seconds_per_item)
+
+    def next_size(self, queue_depth: int) -> int:
+        """Return how many queued items the next batch should take."""
+        if self.seconds_per_item is None:
+            # Start small until there is a latency sample
+            size = self.min_size
+        else:
+            size = int(self.target_batch_seconds / max(self.seconds_per_item, 1e-6))
+        size = max(self.min_size, min(self.max_size, size))
+        return max(1, min(size, queue_depth))
+
+
+class InferenceScheduler:
+    """
+    Serialise and batch embedding requests to a `CLIPModel` with priorities.
+
+    Requests go into bounded per-priority queues drained by worker threads. Interactive
+    requests (a user's uploaded image, prompts) are always served before bulk ones
+    (indexing); bulk work is batched adaptively. Exposes the same embedding methods as
+    `CLIPModel` so it can be used in its place.
+    """
+
+    def __init__(
+        self,
+        model,
+        workers: int = 1,
+        max_queue_size: int = 256,
+        interactive_target_seconds: float = 0.2,
+        bulk_target_seconds: float = 1.0,
+        max_batch_size: int = 32,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None,
+    ):
+        """
+        Initialize the scheduler and start its workers.
+
+        Args:
+            model: Model exposing `embed_images(List[bytes])`, `embed_prompts(List[str])` and `similarity`
+            workers (int): Number of concurrent model calls (default: 1)
+            max_queue_size (int): Capacity of each priority queue; submitters block when it is full
+            interactive_target_seconds (float): Target duration of an interactive batch
+            bulk_target_seconds (float): Target duration of a bulk batch
+            max_batch_size (int): Upper bound for any batch
+            intra_op_threads (Optional[int]): See `configure_threads`
+            inter_op_threads (Optional[int]): See `configure_threads`
+
+        Raises:
+            ValueError: If a thread count (argument or environment variable) is not a positive integer
+        """
+        self.model = model
+        # Validated here so a bad setting fails at startup, not silently in a worker thread
+        self.intra_op_threads = _resolve_thread_count(intra_op_threads, INTRA_OP_THREADS_ENV)
+        self.inter_op_threads = _resolve_thread_count(inter_op_threads, INTER_OP_THREADS_ENV)
+        self.max_queue_size = max_queue_size
+        self._queues: Dict[Priority, Deque[Tuple[Union[bytes, str], Future]]] = {
+            priority: deque() for priority in Priority
+        }
+        # One sizer per priority and kind of item: a text prompt embeds an order of magnitude
+        # faster than an image, so their latencies must not share a moving average
+        targets = {Priority.INTERACTIVE: interactive_target_seconds, Priority.BULK: bulk_target_seconds}
+        self._sizers: Dict[Tuple[Priority, bool], AdaptiveBatchSizer] = {
+            (priority, is_text): AdaptiveBatchSizer(targets[priority], max_size=max_batch_size)
+            for priority in Priority
+            for is_text in (False, True)
+        }
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._threads_configured = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"inference-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ===================== Submission =====================
+    def submit(self, item: Union[bytes, str], priority: Priority = Priority.INTERACTIVE, timeout: Optional[float] = None) -> Future:
+        """
+        Queue one image (bytes) or prompt (str) for embedding.
+
+        Args:
+            item (Union[bytes, str]): Raw image data or text prompt
+            priority (Priority): Queue to use (default: INTERACTIVE)
+            timeout (Optional[float]): Seconds to wait for room in a full queue (default: forever)
+
+        Returns:
+            Future: Resolves to the embedding vector
+
+        Raises:
+            TimeoutError: If the queue stayed full for `timeout` seconds
+        """
+        future: Future = Future()
+        with self._cond:
+            queue = self._queues[priority]
+            if not self._cond.wait_for(lambda: self._stopped or len(queue) < self.max_queue_size, timeout):
+                raise TimeoutError(f"{priority.name.lower()} inference queue is full")
+            if self._stopped:
+                raise RuntimeError("Inference scheduler is stopped")
+            queue.append((item, future))
+            self._cond.notify_all()
+        return future
+
+    def stop(self):
+        """Stop the workers after the batches in flight; queued requests are cancelled."""
+        with self._cond:
+            self._stopped = True
+            for queue in self._queues.values():
+                while queue:
+                    queue.popleft()[1].cancel()
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self) -> Dict[str, float]:
+        """Return queue depths and the current batch sizing state."""
+        with self._cond:
+            stats = {}
+            for priority in Priority:
+                name = priority.name.lower()
+                stats[f"{name}_queue_depth"] = len(self._queues[priority])
+                for is_text, kind in ((False, "image"), (True, "text")):
+                    sizer = self._sizers[(priority, is_text)]
+                    # Size the next batch would have with a full queue
+                    stats[f"{name}_{kind}_batch_size"] = sizer.next_size(sizer.max_size)
+                    stats[f"{name}_{kind}_seconds_per_item"] = sizer.seconds_per_item or 0.0
+            return stats
+
+    # ===================== CLIPModel-compatible API =====================
+    def embed_image(self, image_bytes: bytes, priority: Priority = Priority.INTERACTIVE) -> List[float]:
+        """Embed one image, blocking until its batch has run."""
+        return self.submit(image_bytes, priority).result()
+
+    def embed_images(self, images_bytes: List[bytes], priority: Priority = Priority.BULK) -> List[List[float]]:
+        """Embed several images; they are batched together with other queued work."""
+        futures = [self.submit(image_bytes, priority) for image_bytes in images_bytes]
+        return [future.result() for future in futures]
+
+    def embed_prompts(self, prompts: List[str], priority: Priority = Priority.INTERACTIVE) -> List[List[float]]:
+        """Embed several textual prompts."""
+        futures = [self.submit(prompt, priority) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    def similarity(self, vec1: List[float], vec2: List[float]) -> float:
+        """Compute cosine similarity between two vectors."""
+        return self.model.similarity(vec1, vec2)
+
+    def guess_prompt(self, image_vec: List[float], prompts: List[str]) -> Tuple[str, float]:
+        """Predict which textual prompt best matches a given image (see `CLIPModel.guess_prompt`)."""
+        prompt_vecs = self.embed_prompts(prompts)
+        scores = [self.similarity(image_vec, pvec) for pvec in prompt_vecs]
+        return max(zip(prompts, scores), key=lambda x: x[1])
+
+    # ===================== Worker =====================
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or any(self._queues.values()))
+                if self._stopped:
+                    return
+                sizer_key, batch = self._take_batch()
+                # Wake submitters blocked on a full queue
+                self._cond.notify_all()
+
+            if not batch:
+                continue
+            if not self._threads_configured:
+                # Deferred to the first batch so starting the app never imports torch;
+                # it still happens before the (lazily loaded) model runs
+                configure_threads(self.intra_op_threads, self.inter_op_threads)
+                self._threads_configured = True
+            started = time.perf_counter()
+            self._execute(batch)
+            self._sizers[sizer_key].observe(len(batch), time.perf_counter() - started)
+
+    def _take_batch(self) -> Tuple[Tuple[Priority, bool], List[Tuple[Union[bytes, str], Future]]]:
+        # Highest priority non-empty queue; only items of the same kind (image vs text)
+        # as the head of the queue go into one model call
+        priority = next(p for p in Priority if self._queues[p])
+        queue = self._queues[priority]
+        is_text = isinstance(queue[0][0], str)
+        size = self._sizers[(priority, is_text)].next_size(len(queue))
+        batch = []
+        while queue and len(batch) < size and isinstance(queue[0][0], str) == is_text:
+            item, future = queue.popleft()
+            if future.set_running_or_notify_cancel():
+                batch.append((item, future))
+        return (priority, is_text), batch
+
+    def _execute(self, batch: List[Tuple[Union[bytes, str], Future]]):
+        items = [item for item, _ in batch]
+        try:
+            if isinstance(items[0], str):
+                vectors = [list(vector) for vector in self.model.embed_prompts(items)]
+            else:
+                vectors = [list(vector) for vector in self.model.embed_images(items)]
+            if len(vectors) != len(batch):
+                # Never leave a caller waiting on a future that will not get a result
+                raise RuntimeError(f"Model returned {len(vectors)} vectors for a batch of {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
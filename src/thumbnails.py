@@ -0,0 +1,118 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+from PIL import Image
+
+from src.imaging import open_image
+
+THUMBNAIL_SIZE = (400, 300)
+
+
+def render_thumbnail(path: str, size: Tuple[int, int] = THUMBNAIL_SIZE) -> bytes:
+    """
+    Render an image as a JPEG thumbnail, letterboxed on a white background.
+
+    Args:
+        path (str): Image file path
+        size (Tuple[int, int]): Thumbnail (width, height)
+
+    Returns:
+        bytes: JPEG-encoded thumbnail
+    """
+    img = open_image(path)
+    # Let the JPEG decoder downscale while decoding instead of decoding full size
+    img.draft("RGB", (size[0] * 2, size[1] * 2))
+    img = img.convert("RGB")
+    img.thumbnail(size, Image.LANCZOS)
+    canvas = Image.new("RGB", size, (255, 255, 255))
+    canvas.paste(img, ((size[0] - img.width) // 2, (size[1] - img.height) // 2))
+    with io.BytesIO() as output:
+        canvas.save(output, format="JPEG", quality=85)
+        return output.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Bounded, process-wide cache of encoded thumbnails with background prefetching.
+
+    Only JPEG bytes are kept (never decoded PIL images) and at most `max_entries` of them,
+    so memory does not grow with the gallery. Entries are keyed by path and modification
+    time, so edited files are re-rendered.
+    """
+
+    def __init__(self, max_entries: int = 256, workers: int = 2):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of thumbnails kept
+            workers (int): Threads rendering prefetched thumbnails
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._in_flight: dict = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+
+    def get(self, path: str) -> bytes:
+        """Return the thumbnail of `path`, rendering it now unless cached or being prefetched."""
+        return self._future_for(path).result()
+
+    def prefetch(self, paths: Iterable[str]):
+        """Start rendering thumbnails in the background without waiting for them."""
+        for path in paths:
+            try:
+                self._future_for(path, background=True)
+            except OSError:
+                continue
+
+    def iter_thumbnails(self, paths: Iterable[str]) -> Iterator[Tuple[str, Optional[bytes], Optional[Exception]]]:
+        """
+        Yield (path, thumbnail bytes, error) one image at a time, in order.
+
+        Thumbnails are produced lazily, so the caller can display each one as soon as it is ready.
+        """
+        for path in paths:
+            try:
+                yield path, self.get(path), None
+            except Exception as e:
+                yield path, None, e
+
+    def _future_for(self, path: str, background: bool = False) -> Future:
+        key = (path, os.stat(path).st_mtime_ns)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                future: Future = Future()
+                future.set_result(self._entries[key])
+                return future
+            if key in self._in_flight:
+                return self._in_flight[key]
+            if background:
+                future = self._executor.submit(self._render, key)
+                self._in_flight[key] = future
+                return future
+        # Render in the caller's thread: the image is needed right away
+        future = Future()
+        try:
+            future.set_result(self._render(key))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _render(self, key: Tuple[str, int]) -> bytes:
+        try:
+            data = render_thumbnail(key[0])
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
@@ -35,6 +35,11 @@ translations = {
         "upload_prompt": "📤 Upload Image to Compare",
         "gallery_images": "🖼️ All Images in Gallery",
         "choose_image": "Choose an image...",
+        "page_size": "Images per page",
+        "embeddings_queued": "Embedding {count} images in the background. They become searchable as soon as indexing finishes.",
+        "previous_page": "⬅️ Previous",
+        "next_page": "Next ➡️",
+        "page_indicator": "Page {page} / {pages}",
     },
     "ja": {
         "before_start_title": "📌 はじめに",
@@ -54,6 +59,11 @@ translations = {
         "upload_prompt": "📤 比較する画像をアップロード",
         "gallery_images": "🖼️ ギャラリー内のすべての画像",
         "choose_image": "画像を選択してください...",
+        "page_size": "1ページあたりの画像数",
+        "embeddings_queued": "{count} 枚の画像をバックグラウンドで埋め込んでいます。完了するとすぐに検索できるようになります。",
+        "previous_page": "⬅️ 前へ",
+        "next_page": "次へ ➡️",
+        "page_indicator": "{page} / {pages} ページ",
     }
 }
 